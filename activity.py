@@ -1,19 +1,22 @@
+from abc import ABC, abstractmethod
 from vote import Vote
-from common import Choice
+from common import Choice, choice_str
 
 
-class Activity:
+class Activity(ABC):
     """
     An Activity links a member of Parliament to a specific action they performed
     on a given date.
     """
+    __slots__ = ('member', 'date')
 
     def __init__(self, member, date):
         self.member = member
         self.date = date
 
+    @abstractmethod
     def dict(self, base_URI):
-        raise NotImplementedError()
+        pass
 
 
 class VoteActivity(Activity):
@@ -22,17 +25,19 @@ class VoteActivity(Activity):
     has taken an action in the meeting, in this case the
     action is the casting of a name vote.
     """
+    __slots__ = ('vote', 'choice')
 
     def __init__(self, member, vote: Vote, choice: Choice):
-        Activity.__init__(self, member, vote.meeting.date)
+        self.member = member
+        self.date = vote.meeting.date
         self.vote = vote
         self.choice = choice
 
     def dict(self, base_URI):
         return {
             "type": "vote",
-            "topic": f'{base_URI}{self.vote.meeting_topic.get_uri()}',
-            "choice": str(self.choice)
+            "topic": base_URI + self.vote.meeting_topic.get_uri(),
+            "choice": choice_str[self.choice]
         }
 
 
@@ -44,15 +49,17 @@ class TopicActivity(Activity):
     the meeting. The section in which this topic appeared
     is recorded as well as the specific meeting.
     """
+    __slots__ = ('meeting_topic',)
 
     def __init__(self, member, meeting, meeting_topic):
-        Activity.__init__(self, member, meeting.date)
+        self.member = member
+        self.date = meeting.date
         self.meeting_topic = meeting_topic
 
     def dict(self, base_URI):
         return {
             "type": "topic",
-            "topic": f'{base_URI}{self.meeting_topic.get_uri()}'
+            "topic": base_URI + self.meeting_topic.get_uri()
         }
 
 
@@ -61,15 +68,17 @@ class QuestionActivity(Activity):
     A QuestionActivity represents the fact that the member
     has asked a question (orally or written), a li
     """
+    __slots__ = ('question',)
 
     def __init__(self, member, date, question):
-        Activity.__init__(self, member, date)
+        self.member = member
+        self.date = date
         self.question = question
 
     def dict(self, base_URI):
         return {
             "type": "question",
-            "question": f'{base_URI}{self.question.uri()}'
+            "question": base_URI + self.question.uri()
         }
 
 
@@ -78,13 +87,15 @@ class LegislativeActivity(Activity):
     A LegislativeActivity represents the fact that the member
     has been the author of a Bill or Bill Proposal.
     """
+    __slots__ = ('document',)
 
     def __init__(self, member, date, document):
-        Activity.__init__(self, member, date)
+        self.member = member
+        self.date = date
         self.document = document
 
     def dict(self, base_URI):
         return {
             "type": "legislation",
-            "document": f'{base_URI}{self.document.uri()}'
+            "document": base_URI + self.document.uri()
         }
@@ -2,9 +2,9 @@
 from parliament_parser import ParliamentarySession
 import os
 import sys
-import json
-from os import path, makedirs
-from distutils.dir_util import copy_tree
+from os import path
+import shutil
+from util import write_json
 
 OUTPUT_PATH = "build"
 STATIC_SITE_PATH = "static"
@@ -24,17 +24,24 @@ def main():
     from multiprocessing import Pool, cpu_count
     if len(sys.argv) > 1 and sys.argv[1] == "--help":
         print_usage()
+        sys.exit(0)
+    if len(sys.argv) < 3:
+        print_usage()
+        sys.exit(1)
     os.makedirs(OUTPUT_PATH, exist_ok=True)
 
     with Pool(processes=min(cpu_count(), len(sys.argv[2:]))) as p:
         urls = p.map(session_to_URL, sys.argv[2:])
 
-    sessions = {value: urls[idx] for idx, value in enumerate(sys.argv[2:])}
+    sessions = dict(zip(sys.argv[2:], urls))
 
-    makedirs(OUTPUT_PATH, exist_ok=True)
-    copy_tree("static", "build")
-    with open(path.join(OUTPUT_PATH, 'index.json'), 'w+') as fp:
-        json.dump(sessions, fp, ensure_ascii='false')
+    # The sessions are already written to OUTPUT_PATH, the static site is merged into it
+    if sys.version_info >= (3, 8):
+        shutil.copytree(STATIC_SITE_PATH, OUTPUT_PATH, dirs_exist_ok=True)
+    else:
+        from distutils.dir_util import copy_tree
+        copy_tree(STATIC_SITE_PATH, OUTPUT_PATH)
+    write_json(path.join(OUTPUT_PATH, 'index.json'), sessions)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,7 @@
-from enum import Enum
+from enum import IntEnum
 
 
-class Language(Enum):
+class Language(IntEnum):
     '''
     Enum used to differentiate between the two languages used in the meetings
     of the parliament.
@@ -10,7 +10,7 @@ class Language(Enum):
     FR = 1
 
 
-class Choice(Enum):
+class Choice(IntEnum):
     '''
     Enum used to differentiate between the two languages used in the meetings
     of the parliament.
@@ -18,3 +18,8 @@ class Choice(Enum):
     NO = 0
     YES = 1
     ABSTENTION = 2
+
+
+# Serialized form of each Choice as used in the JSON output ("Choice.YES", ...),
+# computed once instead of calling Enum.__str__ for every vote activity.
+choice_str = {choice: f'Choice.{choice.name}' for choice in Choice}
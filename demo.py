@@ -8,7 +8,7 @@ meetings = session.get_plenary_meetings()
 # %%
 # For a single meeting a lot of information is available
 topics = meetings[0].get_meeting_topics() # <- This is a dict mapping the agenda item number onto an object
-for idx in reversed(list(topics.keys())):
+for idx in sorted(topics):
     print("%d. %s" % (idx, topics[idx].get_title()[0])) # <- Textual objects (titles and section names) are stored as tuples 
     if topics[idx].get_votes():                         #    containing NL on position 0 and FR on position 1.
         vote = topics[idx].get_votes()[0]
@@ -1,16 +1,32 @@
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import parliament_parser
-import requests
 import dateparser
 from activity import LegislativeActivity, QuestionActivity
 import re
-import json
-from util import normalize_str
+from functools import lru_cache
+from util import normalize_str, write_json
 from os import path
 
-
+_NAME_RE = re.compile(r"(.+, .+) (\S+)$")
+_DATE_RE = re.compile(r"[0-9]+/[0-9]+/[0-9]+")
+_INDIEN_RE = re.compile("Indieningsdatum")
+_EUROVOC_MAIN_RE = re.compile("Eurovoc-hoofddescriptor")
+_EUROVOC_KW_RE = re.compile("Eurovoc descriptoren")
+_MIN_RE = re.compile("Antwoordende minister")
+_TITLE_RE = re.compile("Titel")
+_DATUM_RE = re.compile("Datum bespreking")
+# Everything read from a dossier page lives inside div#Story or its table cells,
+# so the head, scripts and navigation don't need to be turned into a tree.
+_DOC_STRAINER = SoupStrainer(['div', 'td', 'h4', 'tr', 'i'])
+_DESC_PREFIX_DOC = 'https://www.dekamer.be/kvvcr/showpage.cfm?section=/flwb&language=nl&cfm=/site/wwwcfm/flwb/flwbn.cfm?lang=N&legislat='
+_DESC_PREFIX_QUESTION = 'https://www.dekamer.be/kvvcr/showpage.cfm?section=inqo&language=nl&cfm=inqoXml.cfm?db=INQO&legislat='
+# The site sometimes serves an error page for a document that does exist.
+_FETCH_ATTEMPTS = 2
+
+
+@lru_cache(maxsize=4096)
 def extract_name(name: str):
-    match = re.match(r"(.+, .+) (\S+)$", name)
+    match = _NAME_RE.match(name)
     if match and match.group(1):
         res = match.group(1)
         res = res.replace(' CD&V -', '') # Fixes a bug caused by "het kartel"
@@ -29,17 +45,25 @@ class ParliamentaryDocument:
         self.keywords = None
         self.title = None
         self.document_type = None
-        self.date = dateparser.parse(session.start)
+        self.date = session.get_start_date()
         self.authors = []
-        self._initialize()
+        self._uri = None
         self.session.documents[document_number] = self
+
+    def load(self):
+        """Fetch and parse the dossier page and register the authors' activities.
+        This is kept out of the constructor so the network I/O can be scheduled by the caller.
+        """
+        self._initialize()
         self._register_activities()
 
     def description_uri(self):
-        return f'https://www.dekamer.be/kvvcr/showpage.cfm?section=/flwb&language=nl&cfm=/site/wwwcfm/flwb/flwbn.cfm?lang=N&legislat={self.session.session}&dossierID={self.document_number}'
+        return f'{_DESC_PREFIX_DOC}{self.session.session}&dossierID={self.document_number}'
 
     def uri(self):
-        return f'legislation/{self.document_number}.json'
+        if self._uri is None:
+            self._uri = f'legislation/{self.document_number}.json'
+        return self._uri
 
     def json_representation(self, base_URI="/"):
         result = {}
@@ -50,7 +74,7 @@ class ParliamentaryDocument:
             result['title'] = self.title
         result['source'] = self.description_uri()
         if not self.date:
-            self.date = dateparser.parse(self.session.start)
+            self.date = self.session.get_start_date()
         result['date'] = self.date.isoformat()
         result['authors'] = [
             f'{base_URI}{author.uri()}' for author in self.authors]
@@ -60,63 +84,65 @@ class ParliamentaryDocument:
             result['keywords'] = self.keywords
         return result
 
-    def json(self, base_path, base_URI="/"):
+    def json(self, base_path, base_URI="/", representation: dict = None):
         base_path = path.join(base_path, "legislation")
-        with open(path.join(base_path, f'{self.document_number}.json'), 'w+') as fp:
-            json.dump(self.json_representation(base_URI), fp, ensure_ascii=False)
-        return f'{base_URI}{self.uri}'
-
-    def _initialize(self, retry=False):
-        page = requests.get(self.description_uri())
-        soup = BeautifulSoup(page.content, 'html.parser')
-        content = soup.find('div', {'id': 'Story'})
-
-        if (not content) or "not found" in content.get_text():
-            if retry:
-                return
-            else:
-                self._initialize(retry=True)
-                return
+        if representation is None:
+            representation = self.json_representation(base_URI)
+        write_json(path.join(base_path, f'{self.document_number}.json'), representation)
+        return base_URI + self.uri()
+
+    def _initialize(self):
+        for attempt in range(_FETCH_ATTEMPTS):
+            # An error page is cached like any other 200 response, so retries bypass the cache
+            page = self.session.requests_session.get(
+                self.description_uri(), force_refresh=attempt > 0)
+            soup = BeautifulSoup(page.content, 'html.parser', parse_only=_DOC_STRAINER)
+            content = soup.find('div', {'id': 'Story'})
+            if content and "not found" not in content.get_text():
+                break
+        else:
+            return
 
-        proposal_date = soup.find('td', text=re.compile('Indieningsdatum'))
+        proposal_date = soup.find('td', text=_INDIEN_RE)
         if not proposal_date:
-            proposal_date = soup.find('td', text=re.compile('[0-9]+/[0-9]+/[0-9]+'))
+            proposal_date = soup.find('td', text=_DATE_RE)
             if proposal_date:
                self.date = dateparser.parse(proposal_date.get_text(), languages=['nl'])
         else:
             self.date = dateparser.parse(
                 proposal_date.parent.find_all('td')[-1].get_text(), languages=['nl'])
         descriptor = soup.find(
-            'td', text=re.compile('Eurovoc-hoofddescriptor'))
+            'td', text=_EUROVOC_MAIN_RE)
         if descriptor:
             self.descriptor = descriptor.parent.find_all('td')[-1].get_text().split(' | ')
-        keywords = soup.find('td', text=re.compile('Eurovoc descriptoren'))
+        keywords = soup.find('td', text=_EUROVOC_KW_RE)
         if keywords:
             self.keywords = keywords.parent.find_all(
                 'td')[-1].get_text().split(' | ')
         title = content.find('h4')
         if title:
             self.title = title.get_text().strip()
-        doc_type_row = [tag for tag in soup.find_all(
-            'td', {'class': "td1x"}) if 'Document type' in tag.get_text()]
-        self.document_type = doc_type_row[0].parent.find(
+        doc_type_cell = authors_cell = None
+        for tag in soup.find_all('td', {'class': "td1x"}):
+            text = tag.get_text()
+            if doc_type_cell is None and 'Document type' in text:
+                doc_type_cell = tag
+            elif authors_cell is None and 'Auteur(s)' in text:
+                authors_cell = tag
+            if doc_type_cell and authors_cell:
+                break
+        self.document_type = doc_type_cell.parent.find(
             'td', {'class': 'td0x'}).find_all(text=True)[0][3:]
         if self.document_type == 'WETSVOORSTEL':
-            authors = [tag for tag in soup.find_all(
-                'td', {'class': "td1x"}) if 'Auteur(s)' in tag.get_text()]
-            authors = authors[0].parent.find(
-                'td', {'class': 'td0x'}).find_all(text=True)
-            authors = [text.strip() for text in authors if (
-                not str(text).isspace()) and ', ' in text]
+            authors_value = authors_cell.parent.find('td', {'class': 'td0x'})
+            # A string containing ', ' can never be whitespace only
+            authors = [text.strip() for text in authors_value.strings if ', ' in text]
             for name in authors:
-                name = normalize_str(name).decode()
-                if name in self.session.get_members_dict():
-                    self.authors.append(self.session.get_members_dict()[name])
-                elif extract_name(name) in self.session.get_members_dict():
-                    self.authors.append(self.session.get_members_dict()[
-                                        extract_name(name)])
+                author = self.session.find_author(name)
+                if author:
+                    self.authors.append(author)
                 else:
-                    print("D:" + name)
+                    print("D:" + normalize_str(name).decode())
 
     def _register_activities(self):
         if not self.authors:
@@ -134,9 +160,15 @@ class ParliamentaryQuestion:
         self.authors = []
         self.title = None
         self.responding_minister = None
-        self.date = dateparser.parse(session.start)
-        self._initialize()
+        self.date = session.get_start_date()
+        self._uri = None
         self.session.questions[document_number] = self
+
+    def load(self):
+        """Fetch and parse the question page and register the authors' activities.
+        This is kept out of the constructor so the network I/O can be scheduled by the caller.
+        """
+        self._initialize()
         self._register_activities()
 
     def _register_activities(self):
@@ -146,14 +178,16 @@ class ParliamentaryQuestion:
             author.post_activity(QuestionActivity(author, self.date, self))
 
     def uri(self):
-        return f'questions/{self.document_number}.json'
+        if self._uri is None:
+            self._uri = f'questions/{self.document_number}.json'
+        return self._uri
 
     def json_representation(self, base_URI="/"):
         result = {}
         result['document_number'] = self.document_number
         result['title'] = self.title
         if not self.date:
-            self.date = dateparser.parse(self.session.start)
+            self.date = self.session.get_start_date()
         result['date'] = self.date.isoformat()
         result['source'] = self.description_uri()
         if self.responding_minister:
@@ -163,56 +197,56 @@ class ParliamentaryQuestion:
             f'{base_URI}{author.uri()}' for author in self.authors]
         return result
 
-    def json(self, base_path, base_URI="/"):
+    def json(self, base_path, base_URI="/", representation: dict = None):
         base_path = path.join(base_path, "questions")
-        with open(path.join(base_path, f'{self.document_number}.json'), 'w+') as fp:
-            json.dump(self.json_representation(base_URI), fp, ensure_ascii=False)
-        return f'{base_URI}{self.uri}'
+        if representation is None:
+            representation = self.json_representation(base_URI)
+        write_json(path.join(base_path, f'{self.document_number}.json'), representation)
+        return base_URI + self.uri()
 
     def description_uri(self):
-        return f'https://www.dekamer.be/kvvcr/showpage.cfm?section=inqo&language=nl&cfm=inqoXml.cfm?db=INQO&legislat={self.session.session}&dossierID=Q{self.document_number}'
-
-    def _initialize(self, retry=False):
-        page = requests.get(self.description_uri())
-        soup = BeautifulSoup(page.content, 'html.parser')
-        body = soup.find('body')
-        if (not body) or "not exist" in body.get_text():
-            if retry:
-                return
-            else:
-                self._initialize(retry=True)
-                return
+        return f'{_DESC_PREFIX_QUESTION}{self.session.session}&dossierID=Q{self.document_number}'
+
+    def _initialize(self):
+        for attempt in range(_FETCH_ATTEMPTS):
+            # An error page is cached like any other 200 response, so retries bypass the cache
+            page = self.session.requests_session.get(
+                self.description_uri(), force_refresh=attempt > 0)
+            soup = BeautifulSoup(page.content, 'html.parser')
+            body = soup.find('body')
+            if body and "not exist" not in body.get_text():
+                break
+        else:
+            return
 
-        authors = [tag for tag in soup.find_all(
-            'td') if 'Auteur(s)' in tag.get_text()]
-        if authors:
-            authors = authors[0].parent.find_all(
+        authors = []
+        authors_cell = soup.find(
+            lambda tag: tag.name == 'td' and 'Auteur(s)' in tag.get_text())
+        if authors_cell:
+            authors = authors_cell.parent.find_all(
                 'td')[1].get_text().split('\n')
             authors = [','.join(text.strip().split(
                 ',')[:-1]) for text in authors if (not str(text).isspace()) and ', ' in text]
 
         for name in authors:
-            name = normalize_str(name).decode()
-            if name in self.session.get_members_dict():
-                self.authors.append(self.session.get_members_dict()[name])
-            elif extract_name(name) in self.session.get_members_dict():
-                self.authors.append(self.session.get_members_dict()[
-                                    extract_name(name)])
+            author = self.session.find_author(name)
+            if author:
+                self.authors.append(author)
             else:
-                print("Q:" + name)
+                print("Q:" + normalize_str(name).decode())
         responding_minister_cell = soup.find(
-            'i', text=re.compile('Antwoordende minister'))
+            'i', text=_MIN_RE)
         if responding_minister_cell:
-            self.responding_minister = responding_minister_cell.find_parent('tr').find_all('td')[
-                1].get_text().strip()[:-1]
+            self.responding_minister = responding_minister_cell.find_parent(
+                'td').find_next_sibling('td').get_text().strip()[:-1]
             self.responding_department = responding_minister_cell.find_parent('tr').find_next('tr').get_text().strip()
-        title = soup.find('i', text=re.compile('Titel'))
+        title = soup.find('i', text=_TITLE_RE)
         if title:
-            self.title = title.find_parent('tr').find_all('td')[
-                1].get_text().strip()
+            self.title = title.find_parent('td').find_next_sibling(
+                'td').get_text().strip()
             self.title = "\n".join(item.strip()
                                    for item in self.title.split('\n') if item.strip())
-        date = soup.find('i', text=re.compile('Datum bespreking'))
+        date = soup.find('i', text=_DATUM_RE)
         if date:
             self.date = dateparser.parse(
-                date.find_parent('tr').find_all('td')[1].get_text().strip(), languages=['nl'])
+                date.find_parent('td').find_next_sibling('td').get_text().strip(), languages=['nl'])
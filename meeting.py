@@ -2,18 +2,32 @@ from enum import Enum
 from common import Language
 from bs4 import BeautifulSoup, NavigableString
 import dateparser
-import requests
-from util import clean_string, go_to_p, clean_list, normalize_str
+from util import clean_string, go_to_p, clean_list, normalize_str, write_json, ensure_dir
 from vote import GenericVote, LanguageGroupVote, electronic_vote_from_table
 import re
-from os import path, makedirs
-import json
+import sys
+from os import path
 from collections import defaultdict
 import parliament_parser
 import datetime
 from activity import TopicActivity
 from document import ParliamentaryDocument, ParliamentaryQuestion
 
+_RE_NUMBERED_TITLE = re.compile(r"([0-9]+) (.*)")
+_RE_VOTE_HEADER = re.compile(r"\(?(Stemming/vote|Vote/stemming)\s+([0-9]+)\)?")
+_RE_VOTE_NOM_1 = re.compile(r"Vote\s*nominatif\s*-\s*Naamstemming:")
+_RE_VOTE_NOM_2 = re.compile(r"Naamstemming\s*-\s*Vote\s*nominatif:")
+_RE_ELECTRONIC = re.compile(r"Comptage\s*électronique\s*–\s*Elektronische telling:")
+# Any of the three above, used to rule out most strings of a page in a single search
+_RE_ANY_VOTE_KIND = re.compile('|'.join(
+    pattern.pattern for pattern in (_RE_VOTE_NOM_1, _RE_VOTE_NOM_2, _RE_ELECTRONIC)))
+_RE_BILL = re.compile(r".*\(([0-9]+)\/.*\)")
+_RE_Q_NEW = re.compile(r".*\(([0-9]{8}(P|C))\)")
+_RE_Q_OLD = re.compile(r".*\(nr\.? (P[0-9]{4})\)")
+# Every substring TopicType.from_section_and_title looks for in a section name
+_RE_SECTION_KEYWORDS = re.compile(
+    r"begroting|actualiteitsdebat|naamstemming|geheim|vragen|interpellatie|herziening|ontwerp|voorstel")
+
 
 class TimeOfDay(Enum):
     '''
@@ -43,6 +57,10 @@ class TopicType(Enum):
     def from_section_and_title(title_NL: str, section_NL: str):
         title_NL = title_NL.lower()
         section_NL = section_NL.lower()
+        # Most topics are general ones, rule those out in a single scan of the section name.
+        # Substrings are needed here, e.g. 'ontwerp' has to match 'wetsontwerpen' as well.
+        if not _RE_SECTION_KEYWORDS.search(section_NL) and 'vragen' not in title_NL and 'vraag' not in title_NL:
+            return TopicType.GENERAL
         if 'begroting' in section_NL:
             return TopicType.BUDGET
         if 'actualiteitsdebat' in section_NL:
@@ -66,10 +84,19 @@ class TopicType(Enum):
         return TopicType.GENERAL
 
 
+# Keys of the topic type groups in the meeting JSON files
+topic_type_str = {topic_type: str(topic_type) for topic_type in TopicType}
+# Topic types whose title refers to legislation by its document number
+_LEGISLATIVE_TOPIC_TYPES = frozenset({TopicType.BILL_PROPOSAL, TopicType.DRAFT_BILL, TopicType.LEGISLATION,
+                                      TopicType.NAME_VOTE, TopicType.SECRET_VOTE})
+
+
 class Meeting:
     """
     A Meeting represents the meeting notes for a gathering of the federal parliament.
     """
+    __slots__ = ('parliamentary_session', 'session', 'id', 'time_of_day', 'date', 'topics')
+
     language_mapping = {
         Language.NL: ('Titre1NL', 'Titre2NL'),
         Language.FR: ('Titre1FR', 'Titre2FR'),
@@ -100,41 +127,34 @@ class Meeting:
         base_meeting_URI = f'{base_URI}meetings/'
         resource_name = f'{self.id}.json'
 
-        makedirs(base_meeting_path, exist_ok=True)
+        ensure_dir(base_meeting_path)
 
         if not self.topics:
             self.get_meeting_topics()
 
-        topics = defaultdict(dict)
-        for key in self.topics:
-            topic = self.topics[key]
-            topics[str(topic.topic_type)][topic.item] = topic
-
-        with open(path.join(base_meeting_path, resource_name), 'w+') as fp:
-            json.dump({
-                'id': self.id,
-                'time_of_day': str(self.time_of_day),
-                'date': self.date.isoformat(),
-                'topics': {
-                    topic_type: {
-                        topic_item: topic_value.dump_json(base_path, base_URI)
-                        for topic_item, topic_value in topic_type_dict.items()
-                    }
-                    for topic_type, topic_type_dict in topics.items()
-                },
-            }, fp, ensure_ascii=False)
+        # Both the topic URIs and their full representations are grouped by topic type,
+        # every topic is only serialized once for both files.
+        # Topics are emitted in agenda order so the output doesn't depend on parsing order.
+        topic_URIs = defaultdict(dict)
+        unfolded = defaultdict(dict)
+        for _, topic in sorted(self.topics.items()):
+            topic_type = topic_type_str[topic.topic_type]
+            representation = topic.json_representation(base_URI)
+            unfolded[topic_type][topic.item] = representation
+            topic_URIs[topic_type][topic.item] = topic.dump_json(
+                base_path, base_URI, representation)
+
+        write_json(path.join(base_meeting_path, resource_name), {
+            'id': self.id,
+            'time_of_day': str(self.time_of_day),
+            'date': self.date.isoformat(),
+            'topics': topic_URIs,
+        })
 
         meeting_dir_path = path.join(base_meeting_path, str(self.id))
-        makedirs(meeting_dir_path, exist_ok=True)
+        ensure_dir(meeting_dir_path)
 
-        with open(path.join(meeting_dir_path, 'unfolded.json'), 'w+') as fp:
-            json.dump({
-                topic_type: {
-                    topic_item: topic_value.json_representation(base_URI)
-                    for topic_item, topic_value in topic_type_dict.items()
-                }
-                for topic_type, topic_type_dict in topics.items()
-            }, fp, ensure_ascii=False)
+        write_json(path.join(meeting_dir_path, 'unfolded.json'), unfolded)
 
         return f'{base_meeting_URI}{resource_name}'
 
@@ -149,36 +169,52 @@ class Meeting:
         """
         return 'https://www.dekamer.be/doc/PCRI/html/%d/ip%03dx.html' % (self.session, self.id)
 
-    def __get_votes(self):
+    def __get_votes(self, soup: BeautifulSoup):
         '''
         This internal method adds information on the votes to MeetingTopics
-        '''
-        page = requests.get(self.get_notes_url())
-        soup = BeautifulSoup(page.content, 'html.parser')
 
+        Args:
+            soup (BeautifulSoup): The parsed meeting notes
+        '''
         print('currently checking:', self.get_notes_url())
 
-        def extract_title_by_vote(table: NavigableString, language: Language):
-            class_name = Meeting.language_mapping[language][1]
+        # Maps id(node) onto the agenda item of the nearest preceding numbered title
+        # sibling in each language, filled in one pass over the children of a parent.
+        agenda_items = {}
+        indexed_parents = set()
 
-            next_line = table.find_previous_sibling("p", {"class": class_name})
-            while not re.match(r"([0-9]+) (.)*", clean_string(next_line.text)):
-                next_line = next_line.find_previous_sibling(
-                    "p", {"class": class_name})
+        def index_agenda_items(parent):
+            current = {language: None for language in Meeting.language_mapping}
+            for node in parent.children:
+                agenda_items[id(node)] = dict(current)
+                if node.name != 'p':
+                    continue
+                classes = node.get('class') or []
+                for language, (_, class_name) in Meeting.language_mapping.items():
+                    if class_name in classes:
+                        match = _RE_NUMBERED_TITLE.match(clean_string(node.text))
+                        if match:
+                            current[language] = int(match.group(1))
+            indexed_parents.add(id(parent))
 
-            match = re.match(r"([0-9]+) (.*)", clean_string(next_line.text))
-            return int(match.group(1))
+        def extract_title_by_vote(table: NavigableString, language: Language):
+            if id(table.parent) not in indexed_parents:
+                index_agenda_items(table.parent)
+            return agenda_items[id(table)][language]
 
-        def extract_vote_number_from_tag(tag, default):
-            header = clean_string(tag.find_parent('p').get_text())
+        def extract_vote_number_from_header(vote_header, default):
+            header = clean_string(vote_header.get_text())
             numeric_values = [int(s) for s in header.split() if s.isdigit()]
             return numeric_values[0] if numeric_values else default
 
         def extract_name_list_from_under_table(current_node):
             name_list = clean_string(current_node.get_text())
-            while not (current_node.name == "table" or 'naamstemming' in current_node.get_text().lower()):
-                if current_node.get_text():
-                    name_list += ',' + clean_string(current_node.get_text())
+            while current_node.name != "table":
+                text = current_node.get_text()
+                if 'naamstemming' in text.lower():
+                    break
+                if text:
+                    name_list += ',' + clean_string(text)
                 current_node = current_node.find_next_sibling()
 
             name_list = clean_list(name_list.split(','))
@@ -190,7 +226,8 @@ class Meeting:
             while current_node and not current_node.name == "table":
                 # Sometimes votes get cancelled, apparently
                 # this check seems to be consistent
-                if 'annulé' in current_node.get_text().lower() or '42.5' in current_node.get_text().lower():
+                text = current_node.get_text().lower()
+                if 'annulé' in text or '42.5' in text:
                     cancelled = True
                     break
                 current_node = current_node.find_next_sibling()
@@ -202,13 +239,22 @@ class Meeting:
             electronic_votes = {}
             s3 = soup.find('div', {'class': 'Section3'})
             if s3:
-                tags = s3.find_all(text=re.compile(
-                    r'Vote\s*nominatif\s*-\s*Naamstemming:'))
-                tags += s3.find_all(text=re.compile(
-                    r'Naamstemming\s*-\s*Vote\s*nominatif:'))
+                # Collect the headers of both kinds in a single walk over the section
+                nom_1_tags, nom_2_tags, electronic_tags = [], [], []
+                for text in s3.descendants:
+                    if not isinstance(text, NavigableString) or not _RE_ANY_VOTE_KIND.search(text):
+                        continue
+                    if _RE_VOTE_NOM_1.search(text):
+                        nom_1_tags.append(text)
+                    if _RE_VOTE_NOM_2.search(text):
+                        nom_2_tags.append(text)
+                    if _RE_ELECTRONIC.search(text):
+                        electronic_tags.append(text)
+
+                tags = nom_1_tags + nom_2_tags
                 for i, tag in enumerate(tags):
-                    vote_number = extract_vote_number_from_tag(tag, i)
                     vote_header = go_to_p(tag)
+                    vote_number = extract_vote_number_from_header(vote_header, i)
                     cancelled, current_node = is_vote_cancelled(vote_header)
                     if cancelled:
                         continue
@@ -221,7 +267,8 @@ class Meeting:
                     abstention = []
 
                     # Handles the case where the abstention box is missing (no abstentions)
-                    if 'onthoudingen' in current_node.get_text().lower() or 'abstentions' in current_node.get_text().lower():
+                    text = current_node.get_text().lower()
+                    if 'onthoudingen' in text or 'abstentions' in text:
                         next_vote = go_to_p(tags[i+1]).find_previous_sibling() if i + 1 < len(
                             tags) else vote_header.parent.find_all('p')[-1]
                         current_node = next_vote
@@ -229,20 +276,20 @@ class Meeting:
                         current_node = current_node.find_previous_sibling()
 
                         # TODO: merge with function
-                        while not (current_node.name == "table" or 'naamstemming' in current_node.get_text().lower()):
-                            if current_node.get_text():
-                                abstention = clean_string(
-                                    current_node.get_text()) + ',' + abstention
+                        while current_node.name != "table":
+                            text = current_node.get_text()
+                            if 'naamstemming' in text.lower():
+                                break
+                            if text:
+                                abstention = clean_string(text) + ',' + abstention
                             current_node = current_node.find_previous_sibling()
                         abstention = clean_list(abstention.split(','))
 
                     name_votes[vote_number] = (yes, no, abstention)
 
-                tags = s3.find_all(text=re.compile(
-                    r'Comptage\s*électronique\s*–\s*Elektronische telling:'))
-                for i, tag in enumerate(tags):
-                    vote_number = extract_vote_number_from_tag(tag, i)
+                for i, tag in enumerate(electronic_tags):
                     vote_header = go_to_p(tag)
+                    vote_number = extract_vote_number_from_header(vote_header, i)
                     cancelled, current_node = is_vote_cancelled(vote_header)
 
                     if cancelled:
@@ -254,9 +301,8 @@ class Meeting:
 
         name_votes, electronic_votes = get_name_and_electronic_votes()
 
-        for tag in soup.find_all(text=re.compile(r'(Stemming/vote|Vote/stemming)\s+([0-9]+)')):
-            vote_number = int(
-                re.match(r'\(?(Stemming/vote|Vote/stemming)\s+([0-9]+)\)?', tag).group(2))
+        for tag in soup.find_all(text=_RE_VOTE_HEADER):
+            vote_number = int(_RE_VOTE_HEADER.match(tag).group(2))
             is_electronic_vote = vote_number in electronic_votes
 
             # Structure for electronic votes is a little different. This case is not inside a table.
@@ -292,13 +338,9 @@ class Meeting:
                 else:
                     continue
                 if vote_number in name_votes:
-                    names = name_votes[vote_number]
-                    vote.set_yes_voters(
-                        [self.parliamentary_session.find_member(name) for name in names[0]])
-                    vote.set_no_voters(
-                        [self.parliamentary_session.find_member(name) for name in names[1]])
-                    vote.set_abstention_voters(
-                        [self.parliamentary_session.find_member(name) for name in names[2]])
+                    find_member = self.parliamentary_session.find_member
+                    vote.set_voters(*([find_member(name) for name in names]
+                                      for names in name_votes[vote_number]))
 
                 self.topics[agenda_item].add_vote(vote)
             elif is_electronic_vote:
@@ -316,7 +358,7 @@ class Meeting:
         """
         if refresh or not self.topics:
             # Obtain the meeting notes
-            page = requests.get(self.get_notes_url())
+            page = self.parliamentary_session.requests_session.get(self.get_notes_url())
             soup = BeautifulSoup(page.content, 'html.parser')
             self.topics = {}
 
@@ -325,35 +367,49 @@ class Meeting:
                 titles = soup.find_all('p', {'class': classes[1]})
                 current_title = ""
 
+                # Maps id(node) onto the nearest preceding section header among its siblings,
+                # filled in one pass over the children of a parent.
+                sections = {}
+                indexed_parents = set()
+
+                def find_section(title):
+                    if id(title.parent) not in indexed_parents:
+                        current = None
+                        for node in title.parent.children:
+                            sections[id(node)] = current
+                            if node.name == 'p' and classes[0] in (node.get('class') or []):
+                                current = node
+                        indexed_parents.add(id(title.parent))
+                    return sections[id(title)]
+
                 while titles:
                     item = titles.pop()
                     if not clean_string(item.text):
                         continue
-                    while not re.match("([0-9]+) (.*)", clean_string(item.text)):
+                    while not _RE_NUMBERED_TITLE.match(clean_string(item.text)):
                         current_title = clean_string(
                             item.text) + '\n' + current_title
                         item = titles.pop()
-                    m = re.match("([0-9]+) (.*)", clean_string(item.text))
+                    m = _RE_NUMBERED_TITLE.match(clean_string(item.text))
 
                     current_title = m.group(2) + '\n' + current_title
-                    section = item.find_previous_sibling(
-                        "p", {"class": classes[0]})
+                    section = find_section(item)
 
                     item = int(m.group(1))
-                    if not item in self.topics:
-                        self.topics[item] = MeetingTopic(
+                    topic = self.topics.get(item)
+                    if topic is None:
+                        topic = self.topics[item] = MeetingTopic(
                             self.parliamentary_session, self, item)
-                    self.topics[item].set_title(
+                    topic.set_title(
                         language, current_title.rstrip())
-                    self.topics[item].set_section(language, clean_string(section.text) if section else (
+                    topic.set_section(language, clean_string(section.text) if section else (
                         "Algemeen" if language == Language.NL else "Generale"))
-                    self.topics[item].complete_type()
+                    topic.complete_type()
                     if language == Language.NL:
                         title = normalize_str(current_title.rstrip().lower()).decode()
-                        for member in self.parliamentary_session.get_members():
-                            if member.normalized_name() in title:
-                                member.post_activity(TopicActivity(
-                                    member, self, self.topics[item]))
+                        for member in self.parliamentary_session.find_members_in_text(title):
+                            member.post_activity(TopicActivity(
+                                member, self, topic))
                     current_title = ""
 
             # Parse Dutch Meeting Topics
@@ -361,7 +417,10 @@ class Meeting:
 
             # Parse French Meeting Topics
             parse_topics(Language.FR)
-            self.__get_votes()
+            self.__get_votes(soup)
+            # The tree is full of parent/child reference cycles, break them so the memory
+            # is released right away instead of whenever the cyclic garbage collector runs.
+            soup.decompose()
         return self.topics
 
     @staticmethod
@@ -389,11 +448,23 @@ class Meeting:
 
 
 def create_or_get_doc(session, number):
-    return ParliamentaryDocument(session, number) if number not in session.documents else session.documents[number]
+    # Topics fetch their documents on the session's document pool, only one thread may create a document.
+    # The constructor registers it in session.documents, so the page is loaded outside the lock.
+    with session.documents_lock:
+        if number in session.documents:
+            return session.documents[number]
+        document = ParliamentaryDocument(session, number)
+    document.load()
+    return document
 
 
 def create_or_get_question(session, number):
-    return ParliamentaryQuestion(session, number) if number not in session.questions else session.questions[number]
+    with session.documents_lock:
+        if number in session.questions:
+            return session.questions[number]
+        question = ParliamentaryQuestion(session, number)
+    question.load()
+    return question
 
 
 class MeetingTopic:
@@ -401,6 +472,8 @@ class MeetingTopic:
     A MeetingTopic represents a single agenda point
     in a meeting of the parliament.
     """
+    __slots__ = ('parliamentary_session', 'session', 'meeting', 'id', 'item', 'topic_type', 'votes',
+                 'related_documents', 'related_questions', 'title_NL', 'title_FR', 'section_NL', 'section_FR', '_uri')
 
     def __init__(self, session, meeting: Meeting, item: int):
         """Constructs a new instance of a MeetingTopic
@@ -419,20 +492,24 @@ class MeetingTopic:
         self.votes = []
         self.related_documents = []
         self.related_questions = []
+        self._uri = None
 
     def get_uri(self):
-        return f'meetings/{self.id}/{self.item}.json'
+        if self._uri is None:
+            self._uri = f'meetings/{self.id}/{self.item}.json'
+        return self._uri
 
     def json_representation(self, session_base_URI: str):
         return {'id': self.item, 'title': {'NL': self.title_NL, 'FR': self.title_FR}, 'votes': [
                       vote.to_dict(session_base_URI) for vote in self.votes], 'questions': [f'{session_base_URI}{question.uri()}' for question in self.related_questions], 'legislation': [f'{session_base_URI}{document.uri()}' for document in self.related_documents]}
 
-    def dump_json(self, base_path: str, session_base_URI: str):
+    def dump_json(self, base_path: str, session_base_URI: str, representation: dict = None):
         topic_path = path.join(base_path, 'meetings', str(self.id))
-        makedirs(topic_path, exist_ok=True)
+        ensure_dir(topic_path)
 
-        with open(path.join(topic_path, f'{self.item}.json'), 'w+') as fp:
-            json.dump(self.json_representation(session_base_URI), fp, ensure_ascii=False)
+        if representation is None:
+            representation = self.json_representation(session_base_URI)
+        write_json(path.join(topic_path, f'{self.item}.json'), representation)
 
         return f'{session_base_URI}{self.get_uri()}'
 
@@ -452,7 +529,6 @@ class MeetingTopic:
             self.title_FR = title
 
     def complete_type(self, type: TopicType = None):
-        import concurrent.futures
         import functools
 
         if type:
@@ -460,29 +536,38 @@ class MeetingTopic:
         else:
             self.topic_type = TopicType.from_section_and_title(
                 self.title_NL, self.section_NL)
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            if self.topic_type == TopicType.BILL_PROPOSAL or self.topic_type == TopicType.DRAFT_BILL or self.topic_type == TopicType.LEGISLATION or self.topic_type == TopicType.NAME_VOTE or self.topic_type == TopicType.SECRET_VOTE:
-                bill_numbers = []
-                for line in self.title_NL.split('\n'):
-                    match = re.match(".*\(([0-9]+)\/.*\)", line)
-                    if match and match.group(1):
-                        bill_numbers.append(match.group(1))
-                self.related_documents = list(executor.map(functools.partial(
-                    create_or_get_doc, self.parliamentary_session), bill_numbers))
-            elif self.topic_type == TopicType.QUESTIONS:
-                questions_numbers = []
-                for line in self.title_NL.split('\n'):
-                    new_format_match = re.match(".*\(([0-9]{8}(P|C))\)", line)
-                    if new_format_match and new_format_match.group(1):
-                        questions_numbers.append(new_format_match.group(1))
-                    else:
-                        old_format_match = re.match(
-                            ".*\(nr\.? (P[0-9]{4})\)", line)
-                        if old_format_match and old_format_match.group(1):
-                            questions_numbers.append(
-                                f'{self.session}{old_format_match.group(1)}')
-                self.related_questions = list(executor.map(functools.partial(
-                    create_or_get_question, self.parliamentary_session), questions_numbers))
+
+        def fetch_all(create_or_get, numbers):
+            # Every number is only fetched once, even if the title mentions it multiple times
+            unique_numbers = list(dict.fromkeys(numbers))
+            results = dict(zip(unique_numbers, self.parliamentary_session.document_pool.map(
+                functools.partial(create_or_get, self.parliamentary_session), unique_numbers)))
+            return [results[number] for number in numbers]
+
+        # Document and question numbers are always between parentheses
+        if self.topic_type in _LEGISLATIVE_TOPIC_TYPES:
+            bill_numbers = []
+            for line in self.title_NL.split('\n'):
+                if '(' not in line:
+                    continue
+                match = _RE_BILL.match(line)
+                if match and match.group(1):
+                    bill_numbers.append(match.group(1))
+            self.related_documents = fetch_all(create_or_get_doc, bill_numbers)
+        elif self.topic_type == TopicType.QUESTIONS:
+            questions_numbers = []
+            for line in self.title_NL.split('\n'):
+                if '(' not in line:
+                    continue
+                new_format_match = _RE_Q_NEW.match(line)
+                if new_format_match and new_format_match.group(1):
+                    questions_numbers.append(new_format_match.group(1))
+                else:
+                    old_format_match = _RE_Q_OLD.match(line)
+                    if old_format_match and old_format_match.group(1):
+                        questions_numbers.append(
+                            f'{self.session}{old_format_match.group(1)}')
+            self.related_questions = fetch_all(create_or_get_question, questions_numbers)
 
     def set_section(self, language: Language, section_name: str):
         """The meeting is also organized in sections, this method allows you to set
@@ -492,6 +577,8 @@ class MeetingTopic:
             language (Language): The language of this section name (e.g. Language.NL)
             section_name (str): The actual section name
         """
+        # Only a handful of distinct section names occur, share a single copy of each
+        section_name = sys.intern(section_name)
         if language == Language.NL:
             self.section_NL = section_name
         else:
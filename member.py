@@ -1,9 +1,8 @@
 import requests
 from bs4 import BeautifulSoup
-from util import normalize_str
-import json
+from util import normalize_str, ensure_dir, write_json
 import uuid
-from os import path, makedirs
+from os import path
 import hashlib
 from typing import List
 from activity import Activity
@@ -42,6 +41,9 @@ class Member:
         sha_1.update(self.first_name.encode('utf-8') + self.last_name.encode('utf-8') +
                      self.party.encode('utf-8') + self.province.encode('utf-8'))
         self.uuid = sha_1.hexdigest()[:10]  # Should be sufficiently random
+        self._uri = None
+        self._normalized_name = normalize_str(
+            ("%s %s" % (self.first_name, self.last_name)).lower()).decode()
 
     def set_gender(self, gender: str):
         self.gender = gender
@@ -54,33 +56,34 @@ class Member:
         self.date_of_birth = dateparser.parse(date)
 
     def uri(self):
-        return f'members/{self.uuid}.json'
+        if self._uri is None:
+            self._uri = f'members/{self.uuid}.json'
+        return self._uri
 
     def dump_json(self, base_path: str, base_URI="/"):
         base_path = path.join(base_path, "members")
         base_URI_members = f'{base_URI}members/'
         resource_name = f'{self.uuid}.json'
-        makedirs(base_path, exist_ok=True)
+        ensure_dir(base_path)
 
-        with open(path.join(base_path, resource_name), 'w+') as fp:
-            replaces = list(map(lambda replacement: {
-                            'member': f'{base_URI_members}{replacement["member"]}.json', 'dates': replacement['dates']}, self.replaces))
-            activity_dict = defaultdict(lambda: defaultdict(list))
-            for activity in self.activities:
-                activity_dict[str(activity.date.year)][str(
-                    activity.date.isoformat())].append(activity.dict(base_URI))
-            activities_dir = path.join(base_path, str(self.uuid))
-            makedirs(activities_dir, exist_ok=True)
+        replaces = list(map(lambda replacement: {
+                        'member': f'{base_URI_members}{replacement["member"]}.json', 'dates': replacement['dates']}, self.replaces))
+        activity_dict = defaultdict(lambda: defaultdict(list))
+        for activity in self.activities:
+            date = activity.date
+            activity_dict[str(date.year)][date.isoformat()].append(
+                activity.dict(base_URI))
+        activities_dir = path.join(base_path, str(self.uuid))
+        ensure_dir(activities_dir)
 
-            activity_uris = {}
+        activity_uris = {}
 
-            for year in activity_dict:
-                with open(path.join(activities_dir, f'{year}.json'), 'w+') as afp:
-                    json.dump(activity_dict[year], afp)
-                activity_uris[year] = f'{base_URI_members}{self.uuid}/{year}.json'
+        for year in activity_dict:
+            write_json(path.join(activities_dir, f'{year}.json'), activity_dict[year])
+            activity_uris[year] = f'{base_URI_members}{self.uuid}/{year}.json'
 
-            json.dump({'id': str(self.uuid), 'first_name': self.first_name, 'last_name': self.last_name, 'gender': self.gender, 'date_of_birth': self.date_of_birth.isoformat(
-            ), 'language': self.language, 'province': self.province, 'party': self.party, 'wiki': self.url, 'replaces': replaces, 'activities': activity_uris, 'photo_url': self.photo_url}, fp, ensure_ascii=False)
+        write_json(path.join(base_path, resource_name), {'id': str(self.uuid), 'first_name': self.first_name, 'last_name': self.last_name, 'gender': self.gender, 'date_of_birth': self.date_of_birth.isoformat(
+        ), 'language': self.language, 'province': self.province, 'party': self.party, 'wiki': self.url, 'replaces': replaces, 'activities': activity_uris, 'photo_url': self.photo_url})
 
         return f'{base_URI_members}{resource_name}'
 
@@ -91,7 +94,7 @@ class Member:
         return "%s, %s" % (self.first_name, self.last_name)
 
     def normalized_name(self):
-        return normalize_str(("%s %s" % (self.first_name, self.last_name)).lower()).decode()
+        return self._normalized_name
 
     def post_activity(self, activity: Activity):
         self.activities.append(activity)
@@ -107,17 +110,21 @@ class Member:
         Returns:
             bool: Is this the name of this member
         """
-        query = normalize_str(query)
-        name = normalize_str("%s %s" % (self.last_name, self.first_name))
+        return normalize_str(query) in self.normalized_names()
+
+    def normalized_names(self):
+        """All normalized names this member can be referred to by in the meeting notes.
+
+        Returns:
+            list(bytes): The names, normalized with normalize_str
+        """
+        names = [normalize_str("%s %s" % (self.last_name, self.first_name))]
         # Fallback for alternative names
-        if self.alternative_names:
-            for n in self.alternative_names:
-                if query == normalize_str(n):
-                    return True
+        names.extend(normalize_str(n) for n in self.alternative_names)
         # Fallback for meetings in session 52, < 90
-        if query == normalize_str(self.last_name):
-            return True
-        return query == name or query == normalize_str(f'{self.first_name} {self.last_name}')
+        names.append(normalize_str(self.last_name))
+        names.append(normalize_str(f'{self.first_name} {self.last_name}'))
+        return names
 
     def set_alternative_names(self, names: List[str]):
         """Set alternative names by which the member should also
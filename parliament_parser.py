@@ -1,12 +1,30 @@
-import json
-import requests
-from bs4 import BeautifulSoup
+import orjson
+import dateparser
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
 from member import Member
 from meeting import Meeting
-import json
+from document import extract_name
 from os import path, makedirs
 import functools
-from util import normalize_str
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from util import normalize_str, write_json, ensure_dir
+
+try:
+    # Optional, speeds up looking for member names in meeting topic titles
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Responses from dekamer.be are cached on disk so re-runs don't download every page again.
+HTTP_CACHE_PATH = '.cache'
+HTTP_CACHE_EXPIRY = 24 * 60 * 60
+# Upper bound on the number of document and question pages fetched at the same time
+DOCUMENT_WORKERS = 10
 
 
 def member_to_URI(base_path, base_URI, member):
@@ -17,6 +35,11 @@ def meeting_to_URI(base_path, base_URI, meeting):
     return meeting.dump_json(base_path, base_URI)
 
 
+def document_to_JSON(base_path, base_URI, document):
+    representation = document.json_representation(base_URI)
+    return representation, document.json(base_path, base_URI, representation)
+
+
 class ParliamentarySession:
     '''
     A ParliamentarySession object is the main entryway to the scraper.
@@ -31,8 +54,6 @@ class ParliamentarySession:
     }
 
     def dump_json(self, output_path: str, base_URI="/"):
-        import concurrent.futures
-
         self.get_members()
         self.get_plenary_meetings()
 
@@ -40,53 +61,44 @@ class ParliamentarySession:
         base_URI = f'{base_URI}sessions/{self.session}/'
         makedirs(base_path, exist_ok=True)
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
+        # Create the whole directory tree up front, the dump_json calls of the workers
+        # then find every directory already created by ensure_dir.
+        for directory in ('legislation', 'questions', 'meetings', 'members'):
+            ensure_dir(path.join(base_path, directory))
+        for meeting in self.plenary_meetings:
+            ensure_dir(path.join(base_path, 'meetings', str(meeting.id)))
+        for member in self.members:
+            ensure_dir(path.join(base_path, 'members', str(member.uuid)))
+
+        with ThreadPoolExecutor(max_workers=20) as executor:
             meeting_URIs = list(executor.map(functools.partial(
                 meeting_to_URI, base_path, base_URI), self.plenary_meetings))
             members_URIs = list(executor.map(functools.partial(
                 member_to_URI, base_path, base_URI), self.members))
 
-        makedirs(path.join(base_path, "legislation"), exist_ok=True)
-        makedirs(path.join(base_path, "questions"), exist_ok=True)
-
-        for question in self.questions.values():
-            question.json(base_path, base_URI)
-        for document in self.documents.values():
-            document.json(base_path, base_URI)
-
-        with open(path.join(base_path, 'legislation', 'unfolded.json'), 'w') as fp:
-            json.dump(
-                {
-                    document.document_number: document.json_representation(base_URI)
-                    for document in self.documents.values()
-                },
-                fp
-            )
-
-        with open(path.join(base_path, 'questions', 'unfolded.json'), 'w') as fp:
-            json.dump(
-                {
-                    document.document_number: document.json_representation(base_URI)
-                    for document in self.questions.values()
-                },
-                fp
-            )
-
-        with open(path.join(base_path, 'legislation', 'index.json'), 'w') as fp:
-            json.dump({document.document_number: f'{base_URI}{document.uri()}' for document in self.documents.values()}, fp)
-
-        with open(path.join(base_path, 'questions', 'index.json'), 'w') as fp:
-            json.dump({question.document_number: f'{base_URI}{question.uri()}' for question in self.questions.values()}, fp)
-
-        with open(path.join(base_path, 'session.json'), 'w') as fp:
-            json.dump({
-                'id': self.session,
-                'start': self.start,
-                'end': self.end,
-                'members': members_URIs,
-                'legislation': f'{base_URI}legislation/index.json',
-                'questions': f'{base_URI}questions/index.json',
-                'meetings': {'plenary': meeting_URIs}}, fp)
+            # Documents and questions are only complete once all meetings are parsed.
+            # Every document is serialized once for its own file, the unfolded file and the index.
+            for directory, documents in (('legislation', self.documents), ('questions', self.questions)):
+                unfolded = {}
+                index = {}
+                documents = list(documents.values())
+                for document, (representation, URI) in zip(documents, executor.map(functools.partial(
+                        document_to_JSON, base_path, base_URI), documents)):
+                    unfolded[document.document_number] = representation
+                    index[document.document_number] = URI
+                write_json(path.join(base_path, directory, 'unfolded.json'), unfolded)
+                write_json(path.join(base_path, directory, 'index.json'), index)
+        # Every meeting is parsed by now, so no more documents will be fetched
+        self.document_pool.shutdown(wait=True)
+
+        write_json(path.join(base_path, 'session.json'), {
+            'id': self.session,
+            'start': self.start,
+            'end': self.end,
+            'members': members_URIs,
+            'legislation': f'{base_URI}legislation/index.json',
+            'questions': f'{base_URI}questions/index.json',
+            'meetings': {'plenary': meeting_URIs}})
         return path.join(base_URI, 'session.json')
 
     def __init__(self, session: int):
@@ -107,11 +119,87 @@ class ParliamentarySession:
         self.members = []
         self.start = ParliamentarySession.sessions[session]['from']
         self.end = ParliamentarySession.sessions[session]['to']
-        self._members_fn_ln = {}
-        self._members_ln_fn = {}
+        self._start_date = None
+        # Every normalized name a member goes by mapped onto the member using it, see find_member
+        self._members_by_name = {}
+        # Raw author names from document pages mapped onto their Member (or None), see find_author
+        self._author_cache = {}
+        self._member_automaton = None
+        # Fallback for find_members_in_text, members bucketed on the first two characters of their name
+        self._members_by_prefix = None
+        # A single HTTP session shared by all meetings and documents of this session,
+        # so keep-alive connections are reused across the worker threads in dump_json
+        # and the document fetches in MeetingTopic.complete_type.
+        # Every session gets its own cache file since build.py scrapes them in separate processes.
+        makedirs(HTTP_CACHE_PATH, exist_ok=True)
+        self.requests_session = requests_cache.CachedSession(
+            path.join(HTTP_CACHE_PATH, f'dekamer_{session}'), backend='sqlite',
+            allowable_codes=(200,), expire_after=HTTP_CACHE_EXPIRY)
+        self.requests_session.mount('https://', HTTPAdapter(
+            pool_connections=4, pool_maxsize=32,
+            # Once the retries are used up the last response is returned, the parsers handle error pages
+            max_retries=Retry(total=5, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504),
+                              raise_on_status=False)))
+        # Shared by the topics of all meetings, so the load on dekamer.be stays bounded
+        # no matter how many meetings are scraped in parallel.
+        self.document_pool = ThreadPoolExecutor(max_workers=DOCUMENT_WORKERS)
+        # Guards the get-or-create of documents and questions on the pool's threads
+        self.documents_lock = threading.Lock()
         # TODO: remove
         self.undefined_members = set()
 
+    def get_start_date(self):
+        """Get the start of the session as a datetime, parsed only once.
+
+        Returns:
+            datetime: The date on which the session started
+        """
+        if not self._start_date:
+            self._start_date = dateparser.parse(self.start)
+        return self._start_date
+
+    def find_members_in_text(self, text: str):
+        """Find all members whose normalized name occurs in the text.
+
+        Args:
+            text (str): Normalized, lowercase text (e.g. a meeting topic title)
+
+        Returns:
+            list(Member): The members mentioned in the text, each listed once.
+        """
+        if not ahocorasick:
+            if self._members_by_prefix is None:
+                members_by_prefix = defaultdict(list)
+                for member in self.get_members():
+                    members_by_prefix[member.normalized_name()[:2]].append(member)
+                # Topics are parsed on several threads, only publish the index once it is complete
+                self._members_by_prefix = members_by_prefix
+
+            # Only members whose name starts with a pair of characters seen in the text can occur in it
+            found = {}
+            for prefix in {text[i:i + 2] for i in range(len(text) - 1)}:
+                for member in self._members_by_prefix.get(prefix, ()):
+                    if member.normalized_name() in text:
+                        found[member.uuid] = member
+            return list(found.values())
+
+        if not self._member_automaton:
+            automaton = ahocorasick.Automaton()
+            for member in self.get_members():
+                name = member.normalized_name()
+                if name in automaton:
+                    automaton.get(name).append(member)
+                else:
+                    automaton.add_word(name, [member])
+            automaton.make_automaton()
+            self._member_automaton = automaton
+
+        found = {}
+        for _, members in self._member_automaton.iter(text):
+            for member in members:
+                found[member.uuid] = member
+        return list(found.values())
+
     def find_member(self, query: str):
         """Using their name as listed in the meeting notes
         find the Member object related.
@@ -124,30 +212,44 @@ class ParliamentarySession:
         """
         if not self.members:
             self.get_members()
-        normalized = normalize_str(query)
-
-        if normalized in self._members_fn_ln:
-            return self._members_fn_ln[normalized]
-
-        for member in self.members:
-            if member.hasName(query):
-                return member
+        member = self._members_by_name.get(normalize_str(query))
+        if member:
+            return member
         print("Undefined member: %s" % query)
         self.undefined_members.add(query)
 
+    def find_author(self, name: str):
+        """Find the member behind an author name as listed on a document page.
+
+        Args:
+            name (str): Author name as seen on the page (e.g. "De Wever, Bart N-VA")
+
+        Returns:
+            Member: The related member, or None if no member matches the name.
+        """
+        if name not in self._author_cache:
+            members = self.get_members_dict()
+            normalized = normalize_str(name).decode()
+            if normalized in members:
+                self._author_cache[name] = members[normalized]
+            else:
+                self._author_cache[name] = members.get(extract_name(normalized))
+        return self._author_cache[name]
+
     def get_members_dict(self):
         if not self.members_dict:
-            self.members_dict = {}
+            # Built aside and published at once, documents are loaded from several threads
+            members_dict = {}
             for member in self.members:
-                first_name = normalize_str(member.first_name).decode()
-                last_name = normalize_str(member.last_name).decode()
-                self.members_dict[f'{first_name}, {last_name}'] = member
-                self.members_dict[f'{first_name}, {last_name} {member.party}'] = member
-                self.members_dict[f'{first_name}, {last_name}, {member.party}'] = member
-                self.members_dict[f'{first_name}, {last_name}'.replace('-', ' ')] = member
+                name = f'{normalize_str(member.first_name).decode()}, {normalize_str(member.last_name).decode()}'
+                members_dict[name] = member
+                members_dict[f'{name} {member.party}'] = member
+                members_dict[f'{name}, {member.party}'] = member
+                members_dict[name.replace('-', ' ')] = member
                 if member.party == "Vooruit":
-                    self.members_dict[f'{first_name}, {last_name}, sp.a'] = member
-                    self.members_dict[f'{first_name}, {last_name} sp.a'] = member
+                    members_dict[f'{name}, sp.a'] = member
+                    members_dict[f'{name} sp.a'] = member
+            self.members_dict = members_dict
         return self.members_dict
 
     def get_plenary_meetings(self, refresh=False):
@@ -164,8 +266,9 @@ class ParliamentarySession:
         if refresh or not self.plenary_meetings:
             URL = 'https://www.dekamer.be/kvvcr/showpage.cfm?section=/cricra&language=nl&cfm=dcricra.cfm?type=plen&cricra=cri&count=all&legislat=%02d' % (
                 self.session)
-            page = requests.get(URL)
-            soup = BeautifulSoup(page.content, 'html.parser')
+            page = self.requests_session.get(URL)
+            # Only the table rows listing the meetings are needed from this page
+            soup = BeautifulSoup(page.content, 'html.parser', parse_only=SoupStrainer('tr'))
             meetings = soup.find_all('tr')
 
             self.plenary_meetings = []
@@ -182,8 +285,8 @@ class ParliamentarySession:
             list(Member): list of all known members within the session
         """
         if not self.members:
-            with open('data/composition/%d.json' % self.session) as json_file:
-                data = json.load(json_file)
+            with open('data/composition/%d.json' % self.session, 'rb') as json_file:
+                data = orjson.loads(json_file.read())
                 for entry in data:
                     # TODO: member should probably take entry at construction time instaed of using these setters
                     member = Member(entry['first_name'], entry['last_name'], entry['party'],
@@ -196,6 +299,9 @@ class ParliamentarySession:
                     if 'photo_url' in entry:
                         member.set_photo_url(entry['photo_url'])
                     self.members.append(member)
+                for member in self.members:
+                    for name in member.normalized_names():
+                        self._members_by_name.setdefault(name, member)
                 # Now that we have all members, link them
                 for member, entry in zip(self.members, data):
                     if 'replaces' in entry:
@@ -206,7 +312,8 @@ class ParliamentarySession:
                             del replacement['name']
                             replacement['member'] = referenced_member.uuid
                         member.set_replaces(replaces)
-            self._members_fn_ln = {normalize_str(
-                f'{member.last_name} {member.first_name}'): member for member in self.members}
+            # The exact "{last_name} {first_name}" form takes precedence over the other names
+            self._members_by_name.update({normalize_str(
+                f'{member.last_name} {member.first_name}'): member for member in self.members})
 
         return self.members
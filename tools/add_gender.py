@@ -1,19 +1,20 @@
 import json
-import requests
+import orjson
 import pywikibot
 import tqdm
+from wiki_api import query_pages, slug_from_url
 site = pywikibot.Site("wikidata", "wikidata")
 repo = site.data_repository()
 
 def main():
-    with open('data/composition/52.json', 'r') as fp:
-        members = json.load(fp)
-        for member in tqdm.tqdm(members):
-            wiki_slug = member['wiki'].replace('https://nl.wikipedia.org/wiki/', '').replace('https://fr.wikipedia.org/wiki/', '')
-            r = requests.get(f'https://nl.wikipedia.org/w/api.php?action=query&prop=pageprops&titles={wiki_slug}&format=json').json()
-            pages = r["query"]["pages"]
-            if pages.keys():
-                page_zero_props = pages[list(pages.keys())[0]]['pageprops']
+    with open('data/composition/52.json', 'rb') as fp:
+        members = orjson.loads(fp.read())
+        # The Wikipedia lookups are batched up front, pywikibot is queried one member at a time
+        pages = query_pages([slug_from_url(member['wiki']) for member in members], prop='pageprops')
+        for member in tqdm.tqdm(members, mininterval=1.0, smoothing=0.01):
+            page = pages[slug_from_url(member['wiki'])]
+            if page:
+                page_zero_props = page.get('pageprops', {})
                 if 'wikibase_item' in page_zero_props:
                     item = pywikibot.ItemPage(repo, page_zero_props['wikibase_item'])
                     member['wikibase_item'] = page_zero_props['wikibase_item']
@@ -26,4 +27,4 @@ def main():
             json.dump(members, op, ensure_ascii=False)
                     
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
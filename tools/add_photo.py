@@ -1,31 +1,58 @@
 import json
-import requests
+import orjson
+import os
 import pywikibot
 import tqdm
+from wiki_api import query_pages, slug_from_url
 site = pywikibot.Site("nl", "wikipedia")
 repo = site.data_repository()
+# Progress is saved every so many members, a rerun skips the members that already have a photo
+CHECKPOINT_EVERY = 50
+
+def save(filename, members):
+    # Write to a temporary file first so an interrupted run never leaves a truncated file behind
+    tmp_filename = f'{filename}.tmp'
+    with open(tmp_filename, 'w') as fp:
+        json.dump(members, fp, ensure_ascii=False)
+    os.replace(tmp_filename, filename)
+
+def get_wikipedia_photos(members):
+    """Look up the free page image of every member's Wikipedia page, in batched queries.
+
+    Returns:
+        dict: Wikipedia slug mapped onto the URL of the page image
+    """
+    slugs = [slug_from_url(member['wiki']) for member in members]
+    pages = query_pages(slugs, prop='pageprops')
+    image_files = {}
+    for slug in slugs:
+        page_props = (pages[slug] or {}).get('pageprops', {})
+        if 'page_image_free' in page_props:
+            image_files[slug] = f'File:{page_props["page_image_free"]}'
+    images = query_pages(image_files.values(), prop='imageinfo', iiprop='url|dimensions|mime')
+    photos = {}
+    for slug, image_file in image_files.items():
+        image = images[image_file]
+        if image and 'imageinfo' in image:
+            photos[slug] = image['imageinfo'][0]['url']
+    return photos
 
 def main():
     filename = 'data/composition/52.json'
-    with open(filename, 'r') as fp:
-        members = json.load(fp)
-    for member in tqdm.tqdm(members):
+    with open(filename, 'rb') as fp:
+        members = orjson.loads(fp.read())
+    # First try wikipedia
+    wikipedia_photos = get_wikipedia_photos([member for member in members if 'photo_url' not in member])
+    for idx, member in enumerate(tqdm.tqdm(members, mininterval=1.0, smoothing=0.01)):
+        if idx and idx % CHECKPOINT_EVERY == 0:
+            save(filename, members)
         if 'photo_url' in member:
             continue
-        # First try wikipedia, then wikidata
-        wiki_slug = member['wiki'].replace('https://nl.wikipedia.org/wiki/', '').replace('https://fr.wikipedia.org/wiki/', '')
-        r = requests.get(f'https://nl.wikipedia.org/w/api.php?action=query&prop=pageprops&titles={wiki_slug}&format=json').json()
-        pages = r["query"]["pages"]
-        if pages.keys():
-            page = pages[list(pages.keys())[0]]['pageprops']
-            if 'page_image_free' in page:
-                #print('has one', wiki_slug)
-                r = requests.get(f'https://nl.wikipedia.org/w/api.php?action=query&generator=images&prop=imageinfo&titles={wiki_slug}&iiprop=url|dimensions|mime&format=json').json()
-                for image in r['query']['pages'].values():
-                    if page['page_image_free'] in image['imageinfo'][0]['url']:
-                        member['photo_url'] = image['imageinfo'][0]['url']
-                        break
+        photo_url = wikipedia_photos.get(slug_from_url(member['wiki']))
+        if photo_url:
+            member['photo_url'] = photo_url
 
+        # then wikidata
         if 'photo_url' not in member and 'wikibase_item' in member:
             item = pywikibot.ItemPage(repo, member['wikibase_item'])
             image_object = item.page_image()
@@ -35,8 +62,7 @@ def main():
         #if 'photo_url' in member:
         #    print(member['photo_url'])
 
-        with open(filename, 'w') as fp:
-            json.dump(members, fp, ensure_ascii=False)
+    save(filename, members)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,51 @@
+import functools
+import requests_cache
+from concurrent.futures import ThreadPoolExecutor
+from os import makedirs, path
+from requests.adapters import HTTPAdapter
+from urllib.parse import unquote
+from urllib3.util.retry import Retry
+
+API_URL = 'https://nl.wikipedia.org/w/api.php'
+# The MediaWiki API accepts up to 50 titles in a single query
+BATCH_SIZE = 50
+HTTP_WORKERS = 8
+# Shares the cache directory of the scraper, the tools are run from the root of the repository as well
+HTTP_CACHE_PATH = '.cache'
+HTTP_CACHE_EXPIRY = 24 * 60 * 60
+
+makedirs(HTTP_CACHE_PATH, exist_ok=True)
+http = requests_cache.CachedSession(path.join(HTTP_CACHE_PATH, 'wikipedia'), backend='sqlite',
+                                    allowable_codes=(200,), expire_after=HTTP_CACHE_EXPIRY)
+http.mount('https://', HTTPAdapter(pool_maxsize=HTTP_WORKERS,
+                                   max_retries=Retry(total=5, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                                                     raise_on_status=False)))
+
+def slug_from_url(url):
+    """Title of the page a (nl or fr) Wikipedia URL points to."""
+    return unquote(url.replace('https://nl.wikipedia.org/wiki/', '').replace('https://fr.wikipedia.org/wiki/', ''))
+
+def _query_batch(titles, params):
+    response = http.get(API_URL, params={'action': 'query', 'titles': '|'.join(titles), 'format': 'json', **params})
+    # Still failing (e.g. rate limited) after the retries, none of the titles get a result
+    if response.status_code != 200:
+        return dict.fromkeys(titles)
+    query = response.json()['query']
+    # MediaWiki canonicalizes titles (e.g. underscores become spaces), map them back onto what was asked for
+    normalized = {entry['from']: entry['to'] for entry in query.get('normalized', [])}
+    pages = {page['title']: page for page in query['pages'].values()}
+    return {title: pages.get(normalized.get(title, title)) for title in titles}
+
+def query_pages(titles, **params):
+    """Query the API for many titles at once, BATCH_SIZE titles per request.
+
+    Returns:
+        dict: Every requested title mapped onto its page in the response, or None
+    """
+    titles = list(dict.fromkeys(titles))
+    batches = [titles[i:i + BATCH_SIZE] for i in range(0, len(titles), BATCH_SIZE)]
+    result = {}
+    with ThreadPoolExecutor(max_workers=HTTP_WORKERS) as executor:
+        for pages in executor.map(functools.partial(_query_batch, params=params), batches):
+            result.update(pages)
+    return result
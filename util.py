@@ -1,8 +1,13 @@
 import unicodedata
+import orjson
+from functools import lru_cache
+from os import makedirs
 from bs4 import NavigableString
 from typing import List
 
 
+# Mostly called on the same few hundred member names over and over
+@lru_cache(maxsize=65536)
 def normalize_str(text: str):
     """Replace diacritical characters and normalize the string this way.
 
@@ -13,9 +18,15 @@ def normalize_str(text: str):
         str: Normalized version of the string
     """
     text = clean_string(text.strip())
+    if text.isascii():
+        # Nothing to decompose, this is by far the most common case for names
+        return text.encode('ascii')
     return unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore')
 
 
+_CLEAN_TABLE = str.maketrans({'.': None, u'\xad': u'-'})
+
+
 def clean_string(text: str):
     """Replace MS Office Special Characters from a String as well as double whitespace
 
@@ -25,13 +36,12 @@ def clean_string(text: str):
     Returns:
         str: Cleaned string
     """
-    result = ' '.join(text.split())
-    result = result.replace('\r', '').replace('.', '').replace(
-        '\n', ' ').replace(u'\xa0', u' ').replace(u'\xad', u'-').rstrip().lstrip()
-    return result
+    # split() already takes care of newlines and non-breaking spaces as they are whitespace,
+    # the remaining characters are handled in a single translate pass
+    return ' '.join(text.split()).translate(_CLEAN_TABLE).strip()
 
 
-banned_set = set([
+banned_set = frozenset([
     # No idea about this one, occurs in the dataset but has passed away before the time the dataset was made?
     # Probably another person with the same name but can't find info about them. (see #10)
     ' Ramaekers Jef',
@@ -59,6 +69,33 @@ banned_set = set([
 ])
 
 
+_created_dirs = set()
+
+
+def ensure_dir(dir_path: str):
+    """Create a directory (and its parents) unless this process already did so.
+    Meant for output directories that many objects write into, such as
+    the topics of a meeting or the members of a session.
+
+    Args:
+        dir_path (str): Path of the directory
+    """
+    if dir_path not in _created_dirs:
+        makedirs(dir_path, exist_ok=True)
+        _created_dirs.add(dir_path)
+
+
+def write_json(file_path: str, data):
+    """Serialize data to a UTF-8 encoded JSON file in a single write.
+
+    Args:
+        file_path (str): Path of the file to (over)write
+        data: JSON serializable object, integer dict keys are allowed
+    """
+    with open(file_path, 'wb') as fp:
+        fp.write(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS))
+
+
 def clean_list(list: List[any]):
     """Removes falsy items from a list
     """
@@ -4,8 +4,31 @@ from typing import List
 import activity
 from common import Choice
 
+# The count and the voter list of a GenericVote that belong to each choice
+_CHOICE_FIELDS = {
+    Choice.YES: ('yes', 'yes_voters'),
+    Choice.NO: ('no', 'no_voters'),
+    Choice.ABSTENTION: ('abstention', 'abstention_voters'),
+}
+
+
+def _parse_count(text: str):
+    try:
+        # int() already ignores the surrounding whitespace, which is all most cells contain
+        return int(text)
+    except ValueError:
+        return int(clean_string(text))
+
+
+def _cell_counts(row: NavigableString, *indices: int):
+    """Read the counts in the given cells of a table row, collecting the cells only once."""
+    cells = row.find_all('td')
+    return [_parse_count(cells[idx].find('p').get_text()) for idx in indices]
+
 
 class Vote:
+    __slots__ = ('meeting', 'meeting_topic', 'vote_number', 'yes', 'unsure', 'passed')
+
     def __init__(self, meeting_topic, vote_number: int, yes: int):
         """A Vote represents a single vote in a meeting.
 
@@ -24,6 +47,7 @@ class Vote:
 class GenericVote(Vote):
     """A Vote represents a single vote in a meeting.
     """
+    __slots__ = ('yes_voters', 'no', 'no_voters', 'abstention', 'abstention_voters')
 
     def __init__(self, meeting_topic, vote_number: int, yes: int, no: int, abstention: int):
         """A Vote represents a single vote in a meeting.
@@ -41,6 +65,7 @@ class GenericVote(Vote):
         self.no_voters = []
         self.abstention = abstention
         self.abstention_voters = []
+        self.passed = self._passes()
 
     def __repr__(self):
         return f"Vote({self.vote_number}, {self.yes}, {self.no}, {self.abstention})"
@@ -52,12 +77,18 @@ class GenericVote(Vote):
             'yes': self.yes,
             'no': self.no,
             'abstention': self.abstention,
-            'passed': self.has_passed(),
-            'voters': {
-                "yes": [f'{session_base_URI}members/{member.uuid}.json' for member in self.yes_voters],
-                "no": [f'{session_base_URI}members/{member.uuid}.json' for member in self.no_voters],
-                "abstention": [f'{session_base_URI}members/{member.uuid}.json' for member in self.abstention_voters]
-            }
+            'passed': self.passed,
+            'voters': self.voters_dict(session_base_URI)
+        }
+
+    def voters_dict(self, session_base_URI: str):
+        """URIs of the members who voted, by their choice.
+        Member.uri() is memoized, so the URIs are only formatted once per member.
+        """
+        return {
+            "yes": [session_base_URI + member.uri() for member in self.yes_voters],
+            "no": [session_base_URI + member.uri() for member in self.no_voters],
+            "abstention": [session_base_URI + member.uri() for member in self.abstention_voters]
         }
 
     def has_passed(self):
@@ -66,6 +97,10 @@ class GenericVote(Vote):
         Returns:
             bool: Does this motion have the majority of votes
         """
+        return self.passed
+
+    def _passes(self):
+        # Recomputed whenever the counts change, see the set_*_voters methods
         # FIXME: No Quorum Check (rule 42.5 of parliament)
         return self.yes > self.no + self.abstention
 
@@ -80,12 +115,9 @@ class GenericVote(Vote):
         Returns:
             Vote: 
         """
-        yes = int(clean_string(vote_rows[1].find_all(
-            'td')[1].find('p').get_text()))
-        no = int(clean_string(vote_rows[2].find_all(
-            'td')[1].find('p').get_text()))
-        abstention = int(clean_string(
-            vote_rows[3].find_all('td')[1].find('p').get_text()))
+        yes, = _cell_counts(vote_rows[1], 1)
+        no, = _cell_counts(vote_rows[2], 1)
+        abstention, = _cell_counts(vote_rows[3], 1)
 
         return GenericVote(meeting_topic, vote_number, yes, no, abstention)
 
@@ -95,15 +127,7 @@ class GenericVote(Vote):
         Args:
             l (List[Member]): A list of Members who voted for
         """
-        if abs(len(l) - self.yes) > 2:
-            # Sometimes there are some inconsistencies in the counts and the reported names
-            # We allow some tolerance for this
-            print(
-                f'NOTE: The number of yes voters did not match the provided list: {len(l)} instead of {self.yes}')
-            self.unsure = True
-        self.yes = len(l)
-        self.yes_voters = l
-        post_vote_activity(self, Choice.YES, l)
+        self._set_voters(Choice.YES, l)
 
     def set_no_voters(self, l):
         """Set the members who voted against
@@ -111,15 +135,7 @@ class GenericVote(Vote):
         Args:
             l (List[Member]): A list of Members who voted against
         """
-        if abs(len(l) - self.no) > 2:
-            # Sometimes there are some inconsistencies in the counts and the reported names
-            # We allow some tolerance for this
-            print(
-                f'NOTE: The number of no voters did not match the provided list: {len(l)} instead of {self.no}')
-            self.unsure = True
-        self.no = len(l)
-        self.no_voters = l
-        post_vote_activity(self, Choice.NO, l)
+        self._set_voters(Choice.NO, l)
 
     def set_abstention_voters(self, l):
         """Set the members who abstained from voting for this motion
@@ -127,19 +143,38 @@ class GenericVote(Vote):
         Args:
             l (List[Member]): A list of Members who abstained from the vote
         """
-        if abs(len(l) - self.abstention) > 2:
+        self._set_voters(Choice.ABSTENTION, l)
+
+    def set_voters(self, yes, no, abstention):
+        """Set the members who voted for, against and abstained in one go
+
+        Args:
+            yes (List[Member]): A list of Members who voted for
+            no (List[Member]): A list of Members who voted against
+            abstention (List[Member]): A list of Members who abstained from the vote
+        """
+        for choice, l in ((Choice.YES, yes), (Choice.NO, no), (Choice.ABSTENTION, abstention)):
+            self._set_voters(choice, l)
+
+    def _set_voters(self, choice: Choice, l):
+        count_field, voters_field = _CHOICE_FIELDS[choice]
+        count = len(l)
+        expected = getattr(self, count_field)
+        if abs(count - expected) > 2:
             # Sometimes there are some inconsistencies in the counts and the reported names
             # We allow some tolerance for this
             print(
-                f'NOTE: The number of abstention voters did not match the provided list: {len(l)} instead of {self.abstention}')
+                f'NOTE: The number of {count_field} voters did not match the provided list: {count} instead of {expected}')
             self.unsure = True
-        self.abstention = len(l)
-        self.abstention_voters = l
-        post_vote_activity(self, Choice.ABSTENTION, l)
+        setattr(self, count_field, count)
+        setattr(self, voters_field, l)
+        self.passed = self._passes()
+        post_vote_activity(self, choice, l)
 
 
 class LanguageGroupVote(GenericVote):
     """For some voting matters a majority in both Language Groups is needed"""
+    __slots__ = ('vote_NL', 'vote_FR')
 
     def __init__(self, meeting_topic, vote_number: int, vote_NL: Vote, vote_FR: Vote):
         """For some voting matters a majority in both Language Groups is needed
@@ -150,10 +185,11 @@ class LanguageGroupVote(GenericVote):
             vote_NL (Vote): The Vote in the Dutch-speaking part of the Parliament
             vote_FR (Vote): The Vote in the French-speaking part of the Parliament
         """
-        GenericVote.__init__(self, meeting_topic, vote_number, vote_NL.yes + vote_FR.yes,
-                             vote_NL.no + vote_FR.no, vote_NL.abstention + vote_FR.abstention)
+        # Set before initializing the counts, _passes depends on both halves
         self.vote_NL = vote_NL
         self.vote_FR = vote_FR
+        GenericVote.__init__(self, meeting_topic, vote_number, vote_NL.yes + vote_FR.yes,
+                             vote_NL.no + vote_FR.no, vote_NL.abstention + vote_FR.abstention)
 
     def __repr__(self):
         return "LanguageGroupVote(%d, %d, %d)" % (self.vote_number, self.vote_NL, self.vote_FR)
@@ -165,25 +201,17 @@ class LanguageGroupVote(GenericVote):
             'yes': self.vote_NL.yes + self.vote_FR.yes,
             'no': self.vote_NL.no + self.vote_FR.no,
             'abstention': self.vote_NL.abstention + self.vote_FR.abstention,
-            'passed': self.has_passed(),
-            'voters': {
-                "yes": [f'{session_base_URI}members/{member.uuid}.json' for member in self.yes_voters],
-                "no": [f'{session_base_URI}members/{member.uuid}.json' for member in self.no_voters],
-                "abstention": [f'{session_base_URI}members/{member.uuid}.json' for member in self.abstention_voters]
-            },
+            'passed': self.passed,
+            'voters': self.voters_dict(session_base_URI),
             'detail': {
                 "NL": self.vote_NL.to_dict(session_base_URI),
                 "FR": self.vote_FR.to_dict(session_base_URI)
             }
         }
 
-    def has_passed(self):
-        """The vote has to pass in both halves of the parliament.
-
-        Returns:
-            bool: Has the vote obtained the necessary majority?
-        """
-        return self.vote_NL.has_passed() and self.vote_FR.has_passed()
+    def _passes(self):
+        # The vote has to pass in both halves of the parliament.
+        return self.vote_NL.passed and self.vote_FR.passed
 
     @staticmethod
     def from_table(meeting_topic, vote_number: int, vote_rows: NavigableString):
@@ -197,25 +225,17 @@ class LanguageGroupVote(GenericVote):
         Returns:
             Vote: 
         """
-        yes_fr = int(clean_string(
-            vote_rows[2].find_all('td')[1].find('p').get_text()))
-        no_fr = int(clean_string(
-            vote_rows[3].find_all('td')[1].find('p').get_text()))
-        abstention_fr = int(clean_string(
-            vote_rows[4].find_all('td')[1].find('p').get_text()))
-
-        yes_nl = int(clean_string(
-            vote_rows[2].find_all('td')[3].find('p').get_text()))
-        no_nl = int(clean_string(
-            vote_rows[3].find_all('td')[3].find('p').get_text()))
-        abstention_nl = int(clean_string(
-            vote_rows[4].find_all('td')[3].find('p').get_text()))
+        # The French counts are in the second column, the Dutch counts in the fourth
+        yes_fr, yes_nl = _cell_counts(vote_rows[2], 1, 3)
+        no_fr, no_nl = _cell_counts(vote_rows[3], 1, 3)
+        abstention_fr, abstention_nl = _cell_counts(vote_rows[4], 1, 3)
 
         return LanguageGroupVote(meeting_topic, vote_number, GenericVote(meeting_topic, vote_number, yes_nl, no_nl, abstention_nl), GenericVote(meeting_topic, vote_number, yes_fr, no_fr, abstention_fr))
 
 
 class ElectronicGenericVote(Vote):
     """Some voting are anonymously organised electronically. We don't have the names in this case"""
+    __slots__ = ('no',)
 
     def __init__(self, meeting_topic, vote_number: int, yes: int, no: int):
         """A Vote represents a single vote in a meeting.
@@ -228,12 +248,13 @@ class ElectronicGenericVote(Vote):
         """
         Vote.__init__(self, meeting_topic, vote_number, yes)
         self.no = no
+        self.passed = self.yes > self.no and self.yes + self.no > 75
 
     def __repr__(self):
         return f"ElectronicGenericVote({self.vote_number}, {self.yes}, {self.no})"
 
     def has_passed(self):
-        return self.yes > self.no and self.yes + self.no > 75
+        return self.passed
 
     def to_dict(self, session_base_URI: str):
         return {
@@ -241,7 +262,7 @@ class ElectronicGenericVote(Vote):
             'type': 'electronic_generic',
             'yes': self.yes,
             'no': self.no,
-            'passed': self.has_passed()
+            'passed': self.passed
         }
 
 
@@ -249,6 +270,7 @@ class ElectronicAdvisoryVote(Vote):
     """Some voting are anonymously organised electronically to inquire whether more opinions are required.
     We don't have the names in this case
     """
+    __slots__ = ()
 
     def __init__(self, meeting_topic, vote_number: int, yes: int):
         """A Vote represents a single vote in a meeting.
@@ -259,6 +281,7 @@ class ElectronicAdvisoryVote(Vote):
             yes (int): Number of yes votes
         """
         Vote.__init__(self, meeting_topic, vote_number, yes)
+        self.passed = self.yes > 50
 
     def __repr__(self):
         return f"ElectronicAdvisoryVote({self.vote_number}, {self.yes})"
@@ -269,14 +292,14 @@ class ElectronicAdvisoryVote(Vote):
         Returns:
             bool: Does this motion have the majority of votes
         """
-        return self.yes > 50
+        return self.passed
 
     def to_dict(self, session_base_URI: str):
         return {
             'id': self.vote_number,
             'type': 'electronic_advisory',
             'yes': self.yes,
-            'passed': self.has_passed()
+            'passed': self.passed
         }
 
 
@@ -292,18 +315,22 @@ def electronic_vote_from_table(meeting_topic, vote_number: int, vote_start_node:
         Vote: 
     """
 
-    yes = int(clean_string(vote_start_node.find_all(
-        'td')[1].find('p').get_text()))
-    vote_end_node = vote_start_node.find_next_sibling().find_next_sibling()
+    yes, = _cell_counts(vote_start_node, 1)
+    # The second tag after the start node, the strings in between are skipped
+    next_tags = (sibling for sibling in vote_start_node.next_siblings if sibling.name)
+    vote_end_node = next(next_tags, None) and next(next_tags, None)
     if not vote_end_node or vote_end_node.name != 'table':
         return ElectronicAdvisoryVote(meeting_topic, vote_number, yes)
 
-    no = int(clean_string(vote_end_node.find_all(
-        'td')[1].find('p').get_text()))
+    no, = _cell_counts(vote_end_node, 1)
 
     return ElectronicGenericVote(meeting_topic, vote_number, yes, no)
 
 
 def post_vote_activity(vote: Vote, choice: Choice, members: List):
+    if not members:
+        return
+    # activity imports this module, so VoteActivity can't be imported at module level.
+    vote_activity = activity.VoteActivity
     for member in members:
-        member.post_activity(activity.VoteActivity(member, vote, choice))
+        member.post_activity(vote_activity(member, vote, choice))